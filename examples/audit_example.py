@@ -5,6 +5,8 @@ This example demonstrates how to use ArcticDB with enterprise audit and traceabi
 All read and write operations require a user_id parameter and are automatically logged.
 """
 
+from itertools import islice
+
 import pandas as pd
 import numpy as np
 import arcticdb as adb
@@ -123,9 +125,9 @@ def main():
     
     # Step 11: View audit logs
     print("\n11. Viewing recent audit logs...")
-    recent_logs = audit_logger.read_logs(limit=10)
+    recent_logs = list(islice(audit_logger.iter_logs(), 5))
     print(f"   Recent operations (last {len(recent_logs)}):")
-    for log in recent_logs[:5]:  # Show first 5
+    for log in recent_logs:
         print(f"   - {log.timestamp[:19]} | {log.actor:15} | {log.operation:15} | {log.symbols}")
     
     # Step 12: System operations
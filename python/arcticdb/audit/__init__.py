@@ -6,8 +6,8 @@ Use of this software is governed by the Business Source License 1.1 included in
 As of the Change Date specified in that file, in accordance with the Business Source License, use of this software will be governed by the Apache License, version 2.0.
 """
 
-from arcticdb.audit.audit_logger import AuditLogger, AuditEntry
+from arcticdb.audit.audit_logger import AuditLogger, AuditEntry, AuditRecord
 from arcticdb.audit.audited_library import AuditedLibrary
 
-__all__ = ["AuditLogger", "AuditEntry", "AuditedLibrary"]
+__all__ = ["AuditLogger", "AuditEntry", "AuditRecord", "AuditedLibrary"]
 
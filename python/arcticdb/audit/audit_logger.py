@@ -6,18 +6,42 @@ Use of this software is governed by the Business Source License 1.1 included in
 As of the Change Date specified in that file, in accordance with the Business Source License, use of this software will be governed by the Apache License, version 2.0.
 """
 
+import atexit
+import hashlib
 import json
 import logging
-from dataclasses import dataclass, asdict
-from datetime import datetime
+import os
+import queue
+import struct
+import sys
+import time
+import weakref
+from itertools import islice
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache, partial
+from operator import attrgetter
 from pathlib import Path
-from typing import Optional, List, Union
-from threading import Lock
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Literal, Mapping, Optional, List, Tuple, Union
+from threading import Event, Lock, Thread
 
+import msgpack
 
-@dataclass
+from arcticdb.dependencies import orjson, _ORJSON_AVAILABLE
+
+
+# dataclass(slots=True) is only available from Python 3.10
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class AuditEntry:
-    """Represents a single audit log entry."""
+    """
+    Represents a single audit log entry.
+
+    Entries are immutable. ``symbols`` and ``metadata`` are stored by reference rather than copied, so they should
+    not be modified after constructing the entry.
+    """
     timestamp: str
     actor: str  # user_id or system_id
     operation: str  # read, write, update, append, delete, etc.
@@ -27,11 +51,695 @@ class AuditEntry:
 
     def to_dict(self):
         """Convert to dictionary for JSON serialization."""
-        return asdict(self)
+        # Built by hand: all fields are flat, so the recursive copy done by dataclasses.asdict is pure overhead
+        return {
+            "timestamp": self.timestamp,
+            "actor": self.actor,
+            "operation": self.operation,
+            "symbols": self.symbols,
+            "library": self.library,
+            "metadata": self.metadata,
+        }
 
     def to_json(self):
-        """Convert to JSON string."""
-        return json.dumps(self.to_dict())
+        """Convert to JSON string. ``metadata`` is left out when it is None."""
+        data = self.to_dict()
+        if self.metadata is None:
+            del data["metadata"]
+        return json.dumps(data)
+
+
+_TAIL_CHUNK_SIZE = 1 << 16
+
+# (second, formatted "YYYY-MM-DDTHH:MM:SS") of the most recent timestamp, shared by entries logged in the same second
+_timestamp_second_cache = (-1, "")
+
+
+def _format_timestamp(time_ns: int) -> str:
+    """UTC time in ISO 8601 format with microsecond precision, e.g. ``2024-01-15T10:30:45.123456``."""
+    global _timestamp_second_cache
+    seconds, nanos = divmod(time_ns, 1_000_000_000)
+    cached_second, prefix = _timestamp_second_cache
+    if cached_second != seconds:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+        _timestamp_second_cache = (seconds, prefix)
+    return f"{prefix}.{nanos // 1000:06d}"
+
+
+# Boolean typed metadata is packed into ``AuditRecord.flags`` with two bits per field: whether it is set, and its
+# value. The flags fit in a byte, so every combination is one of CPython's cached small ints.
+_FLAG_UPSERT_SET, _FLAG_UPSERT = 0x01, 0x02
+_FLAG_LAZY_SET, _FLAG_LAZY = 0x04, 0x08
+_FLAG_PRUNE_SET, _FLAG_PRUNE = 0x10, 0x20
+_FLAG_STAGED_SET, _FLAG_STAGED = 0x40, 0x80
+
+_FLAG_FIELDS = (
+    ("upsert", _FLAG_UPSERT_SET, _FLAG_UPSERT),
+    ("lazy", _FLAG_LAZY_SET, _FLAG_LAZY),
+    ("prune_previous_versions", _FLAG_PRUNE_SET, _FLAG_PRUNE),
+    ("staged", _FLAG_STAGED_SET, _FLAG_STAGED),
+)
+
+# ``AuditRecord.flags`` for a single boolean set to True or False, to be combined with ``|``. Equivalent to setting the
+# matching AuditRecord attribute, without the property call.
+FLAG_UPSERT_TRUE, FLAG_UPSERT_FALSE = _FLAG_UPSERT_SET | _FLAG_UPSERT, _FLAG_UPSERT_SET
+FLAG_LAZY_TRUE, FLAG_LAZY_FALSE = _FLAG_LAZY_SET | _FLAG_LAZY, _FLAG_LAZY_SET
+FLAG_PRUNE_TRUE, FLAG_PRUNE_FALSE = _FLAG_PRUNE_SET | _FLAG_PRUNE, _FLAG_PRUNE_SET
+FLAG_STAGED_TRUE, FLAG_STAGED_FALSE = _FLAG_STAGED_SET | _FLAG_STAGED, _FLAG_STAGED_SET
+
+
+def _flag_property(name: str, set_bit: int, value_bit: int) -> property:
+    def fget(self) -> Optional[bool]:
+        return bool(self.flags & value_bit) if self.flags & set_bit else None
+
+    def fset(self, value: Optional[bool]):
+        flags = self.flags & ~(set_bit | value_bit)
+        if value is not None:
+            flags |= set_bit | value_bit if value else set_bit
+        self.flags = flags
+
+    return property(fget, fset, doc=f"``{name}`` typed metadata, stored in `flags`. None when not set.")
+
+
+class AuditRecord:
+    """
+    An audited operation waiting to be written by `AuditLogger`.
+
+    Operation specific details are set directly on the typed metadata attributes (``prune_previous_versions``,
+    ``staged``, ``upsert``, ``lazy``, ``as_of``, ``versions``, ``count``) instead of building a dict per call. They
+    are combined with ``metadata`` into the entry's metadata when it is written, leaving out those that are None.
+    ``as_of`` and ``versions`` hold the caller's objects and are only converted when written: ints and strings are
+    kept, lists and tuples become lists, and anything else is written as its ``str``. The boolean attributes are
+    stored together in ``flags``.
+    Records are serialized later on the background writer thread, so they must not be modified once submitted.
+    """
+
+    __slots__ = (
+        "time_ns",
+        "actor",
+        "operation",
+        "symbols",
+        "library",
+        "metadata",
+        "flags",
+        "as_of",
+        "versions",
+        "count",
+    )
+
+    upsert = _flag_property("upsert", _FLAG_UPSERT_SET, _FLAG_UPSERT)
+    lazy = _flag_property("lazy", _FLAG_LAZY_SET, _FLAG_LAZY)
+    prune_previous_versions = _flag_property("prune_previous_versions", _FLAG_PRUNE_SET, _FLAG_PRUNE)
+    staged = _flag_property("staged", _FLAG_STAGED_SET, _FLAG_STAGED)
+
+    def __init__(
+        self,
+        actor: str,
+        operation: str,
+        symbols: Union[str, List[str]],
+        library: str,
+        metadata: Optional[dict] = None,
+    ):
+        self.time_ns = time.time_ns()
+        self.actor = actor
+        self.operation = operation
+        self.symbols = [symbols] if isinstance(symbols, str) else symbols
+        self.library = library
+        self.metadata = metadata
+        self.flags = 0
+        self.as_of = None
+        self.versions = None
+        self.count = None
+
+    def entry_metadata(self) -> Optional[dict]:
+        """The metadata written for this record: ``metadata`` plus whichever typed metadata attributes are set."""
+        return _record_metadata(self)
+
+
+_typed_metadata_values = attrgetter("as_of", "versions", "count", "flags")
+
+
+def _metadata_value(value: Any) -> Any:
+    """
+    ``as_of`` or ``versions`` as written to the log. Converted explicitly rather than left to the serializer so that
+    the output doesn't depend on whether orjson is installed.
+    """
+    cls = value.__class__
+    if cls is int or cls is str:
+        return value
+    if cls is list or cls is tuple:
+        return [_metadata_value(item) for item in value]
+    return str(value)
+
+
+def _typed_metadata(values: Tuple[Any, ...]) -> dict:
+    """The metadata given by a record's typed metadata fields, as returned by `_typed_metadata_values`."""
+    as_of, versions, count, flags = values
+    metadata = {}
+    # Records keep the caller's objects so that converting them happens on the writer thread, not in the audited call
+    if as_of is not None:
+        metadata["as_of"] = _metadata_value(as_of)
+    if versions is not None:
+        metadata["versions"] = _metadata_value(versions)
+    if count is not None:
+        metadata["count"] = count
+    if flags:
+        for name, set_bit, value_bit in _FLAG_FIELDS:
+            if flags & set_bit:
+                metadata[name] = bool(flags & value_bit)
+    return metadata
+
+
+def _record_metadata(record: AuditRecord) -> Optional[dict]:
+    """The metadata to write for a record: its ``metadata`` dict plus whichever typed metadata fields are set."""
+    typed_metadata = _typed_metadata(_typed_metadata_values(record))
+    if not typed_metadata:
+        return record.metadata
+    if record.metadata is None:
+        return typed_metadata
+    return {**record.metadata, **typed_metadata}
+
+
+def _iter_lines_reversed(f: BinaryIO) -> Iterator[bytes]:
+    """Yield the lines of a binary file last to first, reading it backwards in fixed size chunks."""
+    position = f.seek(0, os.SEEK_END)
+    remainder = b""
+    while position > 0:
+        chunk_size = min(_TAIL_CHUNK_SIZE, position)
+        position -= chunk_size
+        f.seek(position)
+        lines = (f.read(chunk_size) + remainder).split(b"\n")
+        # The first piece may be the tail end of a line that starts in an earlier chunk
+        remainder = lines[0]
+        for line in reversed(lines[1:]):
+            yield line
+    yield remainder
+
+
+def _json_default(obj) -> Any:
+    """
+    Convert a value JSON has no type for. Shared by both encoders, along with `_ORJSON_OPTIONS`, so that the log
+    doesn't depend on whether orjson is installed.
+    """
+    if isinstance(obj, Enum):
+        # As orjson encodes them natively
+        return obj.value
+    if isinstance(obj, float):
+        # Subclasses such as numpy.float64, which the stdlib encodes as floats but orjson hands to the default
+        return float(obj)
+    return str(obj)
+
+
+def _json_dumps(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), default=_json_default).encode()
+
+
+if _ORJSON_AVAILABLE:
+    # Send the types orjson would otherwise format itself through _json_default, as the stdlib does. NaN and infinity
+    # still differ: orjson writes them as null.
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def _dumps(obj) -> bytes:
+        try:
+            return orjson.dumps(obj, default=_json_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. integers wider than 64 bits, which orjson refuses but the stdlib encodes
+            return _json_dumps(obj)
+
+    _loads = orjson.loads
+
+else:
+    _dumps = _json_dumps
+    _loads = json.loads
+
+
+@lru_cache(maxsize=1024)
+def _line_template(actor: str, operation: str, library: str) -> Tuple[bytes, bytes]:
+    """
+    JSON fragments surrounding the per-entry fields of an audit log line. Callers typically repeat the same
+    actor/operation/library many times, so these are encoded once and reused.
+    """
+    head = b'","actor":' + _dumps(actor) + b',"operation":' + _dumps(operation) + b',"symbols":'
+    tail = b',"library":' + _dumps(library)
+    return head, tail
+
+
+# typed so that e.g. as_of=1 and as_of=1.0, which compare equal but are written differently, are cached separately
+@lru_cache(1024, typed=True)
+def _typed_metadata_suffix(as_of: Any, versions: Any, count: Optional[int], flags: int) -> bytes:
+    """
+    The end of an audit log line for a record whose only metadata is the typed fields with the given values. Each
+    audited operation sets the same fields to a handful of distinct values, so these are encoded once and reused.
+    """
+    metadata = _typed_metadata((as_of, versions, count, flags))
+    if not metadata:
+        return b'}\n'
+    return b',"metadata":' + _dumps(metadata) + b'}\n'
+
+
+def _encode_line(record: AuditRecord) -> bytes:
+    """Serialize a record to a newline terminated JSON line. ``metadata`` is left out when it is None."""
+    head, tail = _line_template(record.actor, record.operation, record.library)
+    line = b'{"timestamp":"' + _format_timestamp(record.time_ns).encode() + head + _dumps(record.symbols) + tail
+    if record.metadata is None:
+        try:
+            return line + _typed_metadata_suffix(*_typed_metadata_values(record))
+        except TypeError:
+            # Unhashable values such as a list of versions can't be cached
+            pass
+    metadata = _record_metadata(record)
+    if metadata is None:
+        return line + b'}\n'
+    return line + b',"metadata":' + _dumps(metadata) + b'}\n'
+
+
+_FRAME_HEADER = struct.Struct("<I")
+
+# Decode strings as str and allow non-string map keys. raw was added in msgpack 0.5.2, replacing encoding, and
+# strict_map_key in 0.6.1 (defaulting to True from 1.0).
+if msgpack.version >= (0, 6, 1):
+    _MSGPACK_UNPACK_KWARGS = {"raw": False, "strict_map_key": False}
+elif msgpack.version >= (0, 5, 2):
+    _MSGPACK_UNPACK_KWARGS = {"raw": False}
+else:
+    _MSGPACK_UNPACK_KWARGS = {"encoding": "utf-8"}
+
+
+def _encode_frame(record: AuditRecord) -> bytes:
+    """
+    Serialize a record to a msgpack array prefixed with its little-endian uint32 length. ``metadata`` is left out of
+    the array when it is None.
+    """
+    fields = [_format_timestamp(record.time_ns), record.actor, record.operation, record.symbols, record.library]
+    metadata = _record_metadata(record)
+    if metadata is not None:
+        fields.append(metadata)
+    payload = msgpack.packb(fields, use_bin_type=True, default=str)
+    return _FRAME_HEADER.pack(len(payload)) + payload
+
+
+# With hash_chain, each batch of entries is written as one line holding the SHA-256 of the previous block, its own
+# SHA-256 and the entries. The hashes are fixed width hex, so the exact bytes that were hashed can be sliced back out.
+_CHAIN_GENESIS = bytes(hashlib.sha256().digest_size)
+_CHAIN_BLOCK_TEMPLATE = b'{"prev":"%s","hash":"%s","records":[%s]}\n'
+_CHAIN_HEX_SIZE = 2 * len(_CHAIN_GENESIS)
+_CHAIN_PREV_START = len(b'{"prev":"')
+_CHAIN_HASH_START = _CHAIN_PREV_START + _CHAIN_HEX_SIZE + len(b'","hash":"')
+_CHAIN_RECORDS_START = _CHAIN_HASH_START + _CHAIN_HEX_SIZE + len(b'","records":[')
+
+
+def _chain_digest(prev: bytes, records: bytes) -> bytes:
+    return hashlib.sha256(prev + records).digest()
+
+
+def _encode_chain_block(prev: bytes, lines: bytes) -> Tuple[bytes, bytes]:
+    """Wrap newline terminated JSON entries in a hash chain block following ``prev``. Returns the line and its hash."""
+    # JSON never contains a raw newline, so the entries can be joined into an array in place
+    records = lines[:-1].replace(b"\n", b",")
+    digest = _chain_digest(prev, records)
+    return _CHAIN_BLOCK_TEMPLATE % (prev.hex().encode(), digest.hex().encode(), records), digest
+
+
+def _parse_chain_block(line: bytes) -> Optional[Tuple[bytes, bytes, bytes]]:
+    """The previous hash, hash and hashed entry bytes of a hash chain block line, or None if it isn't one."""
+    line = line.rstrip(b"\n")
+    if (
+        len(line) < _CHAIN_RECORDS_START + 2
+        or line[:_CHAIN_PREV_START] != b'{"prev":"'
+        or line[_CHAIN_PREV_START + _CHAIN_HEX_SIZE : _CHAIN_HASH_START] != b'","hash":"'
+        or line[_CHAIN_HASH_START + _CHAIN_HEX_SIZE : _CHAIN_RECORDS_START] != b'","records":['
+        or not line.endswith(b"]}")
+    ):
+        return None
+    try:
+        prev = bytes.fromhex(line[_CHAIN_PREV_START : _CHAIN_PREV_START + _CHAIN_HEX_SIZE].decode())
+        digest = bytes.fromhex(line[_CHAIN_HASH_START : _CHAIN_HASH_START + _CHAIN_HEX_SIZE].decode())
+    except ValueError:
+        return None
+    return prev, digest, line[_CHAIN_RECORDS_START:-2]
+
+
+def _read_last_chain_hash(path: Path) -> bytes:
+    """The hash of the last block in a hash chained log, so that appending to it continues the chain."""
+    if not path.exists():
+        return _CHAIN_GENESIS
+    with open(path, 'rb') as f:
+        for line in _iter_lines_reversed(f):
+            if line:
+                block = _parse_chain_block(line)
+                return block[1] if block is not None else _CHAIN_GENESIS
+    return _CHAIN_GENESIS
+
+
+def _iter_frames(f: BinaryIO) -> Iterator[bytes]:
+    """Yield the payloads of a length-prefixed msgpack audit log, stopping at a truncated trailing frame."""
+    header_size = _FRAME_HEADER.size
+    while True:
+        header = f.read(header_size)
+        if len(header) < header_size:
+            return
+        (length,) = _FRAME_HEADER.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length:
+            return
+        yield payload
+
+
+def _intern(value):
+    return sys.intern(value) if value.__class__ is str else value
+
+
+def _parse_entry(timestamp, actor, operation, symbols, library, metadata=None) -> AuditEntry:
+    # Actors, operations and libraries come from a small set of values, so share one string object for each
+    return AuditEntry(timestamp, _intern(actor), _intern(operation), symbols, _intern(library), metadata)
+
+
+def _log_to_console(console: logging.Logger, record: AuditRecord):
+    # Formatting is deferred to the handler so large symbol lists are not rendered when the record is filtered out
+    if console.isEnabledFor(logging.INFO):
+        console.info(
+            "actor=%s operation=%s library=%s symbols=%s metadata=%s",
+            record.actor,
+            record.operation,
+            record.library,
+            record.symbols,
+            _record_metadata(record),
+        )
+
+
+def _stringified_record(record: AuditRecord) -> AuditRecord:
+    """A copy of a record that failed to serialize, with anything that might not be serializable made a string."""
+    copy = AuditRecord(
+        str(record.actor),
+        str(record.operation),
+        [str(symbol) for symbol in record.symbols] if isinstance(record.symbols, list) else str(record.symbols),
+        str(record.library),
+        None if record.metadata is None else {"unserializable_metadata": repr(record.metadata)},
+    )
+    copy.time_ns = record.time_ns
+    copy.flags = record.flags if isinstance(record.flags, int) else 0
+    copy.as_of = None if record.as_of is None else str(record.as_of)
+    copy.versions = None if record.versions is None else str(record.versions)
+    copy.count = record.count if isinstance(record.count, int) else None
+    return copy
+
+
+class _FlushRequest:
+    """Queued behind pending entries; set once they have all been written to the file."""
+
+    __slots__ = ("done",)
+
+    def __init__(self):
+        self.done = Event()
+
+
+_STOP = object()
+
+
+# Operations whose identical entries within one batch may be written as a single entry
+_DEDUPLICATED_OPERATIONS = frozenset(("read", "read_batch"))
+
+
+def _deduplicate_reads(records: List[AuditRecord]) -> List[AuditRecord]:
+    """
+    Collapse reads in ``records`` that share actor, operation, library, symbols and typed metadata into their first
+    occurrence, whose metadata then gives the number of reads as ``repeated`` and the time of the last as
+    ``last_timestamp``. Records with free-form metadata, and all other operations, are kept as they are.
+    """
+    deduplicated = []
+    repeats = {}
+    for record in records:
+        if record.operation in _DEDUPLICATED_OPERATIONS and record.metadata is None:
+            try:
+                key = (
+                    record.actor,
+                    record.operation,
+                    record.library,
+                    tuple(record.symbols),
+                    _typed_metadata_values(record),
+                )
+                repeat = repeats.get(key)
+            except TypeError:
+                # Unhashable typed metadata, e.g. a list of versions
+                deduplicated.append(record)
+                continue
+            if repeat is None:
+                repeats[key] = [record, 1, record.time_ns]
+                deduplicated.append(record)
+            else:
+                repeat[1] += 1
+                repeat[2] = record.time_ns
+        else:
+            deduplicated.append(record)
+    for record, count, last_time_ns in repeats.values():
+        if count > 1:
+            record.metadata = {"repeated": count, "last_timestamp": _format_timestamp(last_time_ns)}
+    return deduplicated
+
+
+class _AuditWriter:
+    """
+    Owns the audit log file handle and a daemon thread that drains queued entries into it.
+
+    Kept separate from `AuditLogger` so that the thread never references the logger, which can then still be
+    garbage collected (and closed) as normal.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path],
+        console: Optional[logging.Logger],
+        fsync_every_n: Optional[int],
+        max_batch: int,
+        batch_window: float,
+        flush_interval: Optional[float],
+        encode: Callable[[AuditRecord], bytes],
+        max_bytes: Optional[int],
+        max_queue_size: int,
+        block_on_full: bool,
+        deduplicate_reads: bool,
+        hash_chain: bool,
+    ):
+        self._path = path
+        # Hash of the last block written, continued across restarts and rotation. None when not chaining.
+        self._chain_hash = _read_last_chain_hash(path) if hash_chain and path is not None else None
+        # Keep a single handle open for the lifetime of the writer rather than reopening per entry
+        self._fh = self._open() if path is not None else None
+        # Tracked here rather than with tell() so that checking for rotation costs no syscalls
+        self._file_size = self._fh.tell() if self._fh is not None else 0
+        self._max_bytes = max_bytes
+        self._encode = encode
+        self._console = console
+        self._fsync_every_n = fsync_every_n
+        self._max_batch = max_batch
+        self._batch_window = batch_window
+        self._flush_interval = flush_interval
+        self._queue = queue.Queue(max_queue_size) if max_queue_size > 0 else queue.SimpleQueue()
+        self._block_on_full = block_on_full
+        self._deduplicate_reads = deduplicate_reads
+        self._entries_since_fsync = 0
+        # Set once the writer thread has exited, so that callers stop waiting on it
+        self._stopped = False
+        self._thread = Thread(target=self._run, name="arcticdb-audit-writer", daemon=True)
+        self._thread.start()
+
+    def _open(self) -> BinaryIO:
+        # Append mode also creates the file if needed
+        return open(self._path, 'ab', buffering=1 << 16)
+
+    def _rotate(self):
+        """Move the full log file aside to ``<log_file>.<UTC timestamp>`` and start a new one."""
+        self._fh.close()
+        suffix = _format_timestamp(time.time_ns()).replace("-", "").replace(":", "")
+        try:
+            os.rename(self._path, self._path.with_name(f"{self._path.name}.{suffix}"))
+        finally:
+            # Keep logging even if the rename failed
+            self._fh = self._open()
+            self._file_size = self._fh.tell()
+
+    @property
+    def stopped(self) -> bool:
+        """Whether the writer thread has exited. Nothing more is written once it has."""
+        return self._stopped
+
+    def submit(self, record: Union[AuditRecord, List[AuditRecord]]) -> bool:
+        """
+        Queue a record, or a list of records to be written together, for writing. Returns False if it was dropped
+        because the queue is full or the writer thread has stopped.
+        """
+        if self._stopped:
+            return False
+        try:
+            self._queue.put(record, False)
+        except queue.Full:
+            if not self._block_on_full:
+                return False
+            # Wait for space, but give up if the writer thread stops and will never make any
+            while not self._stopped:
+                try:
+                    self._queue.put(record, True, 1.0)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        return True
+
+    def flush(self):
+        """Block until every entry submitted so far has been written to the file."""
+        if self._stopped:
+            return
+        request = _FlushRequest()
+        self._queue.put(request)
+        while not request.done.wait(1.0):
+            if not self._thread.is_alive():
+                return
+
+    def close(self):
+        """Write out all pending entries, close the file and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        try:
+            while True:
+                try:
+                    batch = [self._queue.get(timeout=self._flush_interval)]
+                except queue.Empty:
+                    # Idle: hand whatever is sitting in the file buffer to the OS
+                    self._flush_file()
+                    continue
+                if not self._process(self._collect_batch(batch)):
+                    return
+        finally:
+            self._stopped = True
+            # Release anyone still waiting on a flush
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, _FlushRequest):
+                    item.done.set()
+
+    def _flush_file(self):
+        if self._fh is None:
+            return
+        try:
+            self._fh.flush()
+        except Exception:
+            logging.getLogger("arcticdb.audit").exception("Failed to flush the audit log file")
+
+    def _collect_batch(self, batch: list) -> list:
+        """
+        Add everything already queued to the batch, then keep waiting up to ``batch_window`` seconds for more so that
+        bursts of entries go out in a single write. Stops early once the batch holds a flush or stop request.
+        """
+        get, get_nowait = self._queue.get, self._queue.get_nowait
+        deadline = None
+        while len(batch) < self._max_batch and isinstance(batch[-1], (AuditRecord, list)):
+            try:
+                batch.append(get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            if not self._batch_window:
+                break
+            if deadline is None:
+                deadline = time.monotonic() + self._batch_window
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _process(self, batch: list) -> bool:
+        records = []
+        for item in batch:
+            if isinstance(item, AuditRecord):
+                records.append(item)
+            elif isinstance(item, list):
+                # Queued together by AuditLogger.log_many
+                records.extend(item)
+        try:
+            self._write(records)
+        except Exception:
+            logging.getLogger("arcticdb.audit").exception("Failed to write %d audit entries", len(records))
+
+        stop = _STOP in batch
+        flush_requests = [item for item in batch if item.__class__ is _FlushRequest]
+        try:
+            if stop or flush_requests:
+                self._flush_file()
+            if stop and self._fh is not None:
+                try:
+                    self._fh.close()
+                except Exception:
+                    logging.getLogger("arcticdb.audit").exception("Failed to close the audit log file")
+        finally:
+            for request in flush_requests:
+                request.done.set()
+        return not stop
+
+    def _encode_each(self, records: List[AuditRecord]) -> Iterator[bytes]:
+        """
+        Encode records one at a time. A record that can't be serialized is written with its fields converted to
+        strings instead, and is only skipped if even that fails.
+        """
+        for record in records:
+            try:
+                yield self._encode(record)
+                continue
+            except Exception:
+                pass
+            try:
+                yield self._encode(_stringified_record(record))
+            except Exception:
+                logging.getLogger("arcticdb.audit").exception(
+                    "Skipping audit entry for %r that could not be serialized", record.operation
+                )
+
+    def _write(self, records: List[AuditRecord]):
+        if not records:
+            return
+        if self._deduplicate_reads:
+            records = _deduplicate_reads(records)
+        if self._console is not None:
+            for record in records:
+                try:
+                    _log_to_console(self._console, record)
+                except Exception:
+                    logging.getLogger("arcticdb.audit").exception("Failed to log an audit entry to the console")
+        if self._fh is None:
+            return
+        try:
+            data = b''.join(map(self._encode, records))
+        except Exception:
+            # Find the records that can't be serialized rather than losing the whole batch
+            data = b''.join(self._encode_each(records))
+        if self._chain_hash is not None:
+            data, self._chain_hash = _encode_chain_block(self._chain_hash, data)
+        self._fh.write(data)
+        self._file_size += len(data)
+        if self._fsync_every_n:
+            self._entries_since_fsync += len(records)
+            if self._entries_since_fsync >= self._fsync_every_n:
+                self._fh.flush()
+                os.fsync(self._fh.fileno())
+                self._entries_since_fsync = 0
+        if self._max_bytes and self._file_size >= self._max_bytes:
+            self._rotate()
+
+
+def _close_at_exit(logger_ref: weakref.ref):
+    """atexit handler for an `AuditLogger`. Holds it weakly, so that registering doesn't keep it alive."""
+    audit_logger = logger_ref()
+    if audit_logger is not None:
+        audit_logger.close()
 
 
 class AuditLogger:
@@ -41,7 +749,22 @@ class AuditLogger:
     Logs all read and write operations with timestamp, actor, operation type, and affected symbols.
     """
 
-    def __init__(self, log_file: Optional[Union[str, Path]] = None, enable_console: bool = True):
+    def __init__(
+        self,
+        log_file: Optional[Union[str, Path]] = None,
+        enable_console: bool = True,
+        fsync_every_n: Optional[int] = None,
+        flush_threshold: int = 64,
+        batch_window: float = 0.005,
+        flush_interval: Optional[float] = 1.0,
+        log_format: Literal["jsonl", "msgpack"] = "jsonl",
+        max_bytes: Optional[int] = None,
+        max_queue_size: int = 0,
+        block_on_full: bool = True,
+        deduplicate_reads: bool = False,
+        enabled: bool = True,
+        hash_chain: bool = False,
+    ):
         """
         Initialize the audit logger.
 
@@ -51,17 +774,69 @@ class AuditLogger:
             Path to the audit log file. If None, only console logging is used.
         enable_console : bool, default=True
             Whether to also log to console/standard logging.
+        fsync_every_n : Optional[int], default=None
+            If set, flush and fsync the log file after every ``fsync_every_n`` entries. If None, durability is
+            left to the OS and to `flush`/`close`.
+        flush_threshold : int, default=64
+            Maximum number of queued entries the background writer combines into a single write to the log file.
+        batch_window : float, default=0.005
+            Number of seconds the background writer waits for further entries to arrive before writing a batch, so that
+            bursts of single entries share one write (and one fsync). 0 writes whatever is queued immediately.
+        flush_interval : Optional[float], default=1.0
+            Number of idle seconds after which the background writer flushes buffered entries to the OS. If None,
+            buffered entries are only flushed when the file buffer fills, on `flush`/`close`, or at interpreter exit.
+        log_format : Literal["jsonl", "msgpack"], default="jsonl"
+            Encoding of the log file. "jsonl" writes one human-readable JSON object per line. "msgpack" writes
+            length-prefixed msgpack records, which are smaller and faster to parse but not human-readable. A log file
+            must always be read with the format it was written in.
+        max_bytes : Optional[int], default=None
+            If set, once the log file reaches this size it is renamed to ``<log_file>.<UTC timestamp>`` and a new
+            log file is started. `read_logs` and `iter_logs` only read the current file.
+        max_queue_size : int, default=0
+            Maximum number of entries waiting for the background writer. 0 means unbounded.
+        block_on_full : bool, default=True
+            What `log` does when the queue is full. If True, it waits for space, applying backpressure to the caller.
+            If False, the entry is dropped and counted in `dropped_entries`.
+        deduplicate_reads : bool, default=False
+            If True, identical "read" and "read_batch" entries that the background writer handles together (see
+            ``flush_threshold`` and ``batch_window``) are written once, with ``repeated`` and ``last_timestamp`` in
+            their metadata. Entries with metadata passed to `log` are never combined.
+        enabled : bool, default=True
+            If False, nothing is logged and no background writer is started. `AuditedLibrary` checks this when it is
+            created and then calls the wrapped library directly. Existing logs can still be read. Fixed for the
+            lifetime of the logger; see `enabled`.
+        hash_chain : bool, default=False
+            If True, make the log tamper-evident. Each batch of entries is written as a single line holding the
+            entries, their SHA-256 hash and the hash of the previous line, which `verify_chain` checks. Only
+            supported with the "jsonl" format. A log file must always be written with the same setting.
         """
+        if log_format not in ("jsonl", "msgpack"):
+            raise ValueError(f"Unsupported audit log_format {log_format!r}, expected 'jsonl' or 'msgpack'")
+        if hash_chain and log_format != "jsonl":
+            raise ValueError("hash_chain is only supported with log_format='jsonl'")
         self.log_file = Path(log_file) if log_file else None
         self.enable_console = enable_console
-        self._lock = Lock()
+        self.fsync_every_n = fsync_every_n
+        self.flush_threshold = flush_threshold
+        self.log_format = log_format
+        self.max_bytes = max_bytes
+        self._enabled = enabled
+        self.hash_chain = hash_chain
+        self._writer = None
+        self._dropped_entries = 0
+        # Reasons for dropping entries that have already been warned about
+        self._drop_warnings = set()
+        self._dropped_lock = Lock()
+        # Called before flushing, e.g. to submit entries an AuditedLibrary is holding back. Held weakly so that
+        # registering doesn't keep the owner alive.
+        self._flush_hooks: List[weakref.WeakMethod] = []
         
         # Set up standard logger
         self.logger = logging.getLogger("arcticdb.audit")
         self.logger.setLevel(logging.INFO)
         
         # Add console handler if enabled
-        if enable_console and not self.logger.handlers:
+        if enabled and enable_console and not self.logger.handlers:
             console_handler = logging.StreamHandler()
             console_handler.setLevel(logging.INFO)
             formatter = logging.Formatter(
@@ -71,11 +846,31 @@ class AuditLogger:
             console_handler.setFormatter(formatter)
             self.logger.addHandler(console_handler)
 
-        # Create log file if specified
-        if self.log_file:
-            self.log_file.parent.mkdir(parents=True, exist_ok=True)
-            if not self.log_file.exists():
-                self.log_file.touch()
+        # Create log file directory if specified
+        if enabled and self.log_file:
+            parent = self.log_file.parent
+            if not parent.exists():
+                parent.mkdir(parents=True, exist_ok=True)
+
+        # Console and file output happen on a background thread so that log() never waits on I/O
+        if enabled and (self.log_file or enable_console):
+            self._writer = _AuditWriter(
+                self.log_file,
+                self.logger if enable_console else None,
+                fsync_every_n,
+                flush_threshold,
+                batch_window,
+                flush_interval,
+                _encode_frame if log_format == "msgpack" else _encode_line,
+                max_bytes,
+                max_queue_size,
+                block_on_full,
+                deduplicate_reads,
+                hash_chain,
+            )
+            # Close through the logger rather than the writer, so that its flush hooks still run at exit
+            self._exit_handler = partial(_close_at_exit, weakref.ref(self))
+            atexit.register(self._exit_handler)
 
     def log(
         self,
@@ -100,65 +895,217 @@ class AuditLogger:
             Library name
         metadata : Optional[dict]
             Additional metadata to log
+
+        Notes
+        -----
+        The entry is serialized later on the background writer thread, and the ``symbols`` list and ``metadata`` dict
+        are not copied. Callers must not mutate them after calling `log`.
         """
-        # Normalize symbols to list
-        if isinstance(symbols, str):
-            symbols = [symbols]
-
-        # Create audit entry
-        entry = AuditEntry(
-            timestamp=datetime.utcnow().isoformat(),
-            actor=actor,
-            operation=operation,
-            symbols=symbols,
-            library=library,
-            metadata=metadata
-        )
+        if self.enabled:
+            self.submit(AuditRecord(actor, operation, symbols, library, metadata))
 
-        # Thread-safe logging
-        with self._lock:
-            # Log to console/standard logger
-            if self.enable_console:
-                self.logger.info(
-                    f"actor={actor} operation={operation} library={library} "
-                    f"symbols={symbols} metadata={metadata}"
-                )
+    def submit(self, record: AuditRecord):
+        """
+        Log a pre-built `AuditRecord`.
 
-            # Log to file
-            if self.log_file:
-                with open(self.log_file, 'a') as f:
-                    f.write(entry.to_json() + '\n')
+        Equivalent to `log`, for callers that set the record's typed metadata attributes rather than building a
+        metadata dict. The record must not be modified after it has been submitted.
+        """
+        writer = self._writer
+        if writer is not None:
+            if not writer.submit(record):
+                self._record_dropped_entry(writer)
+        elif self.enabled and self.enable_console:
+            _log_to_console(self.logger, record)
 
-    def read_logs(self, limit: Optional[int] = None) -> List[AuditEntry]:
+    def log_many(self, entries: Iterable[Mapping[str, Any]]):
         """
-        Read audit logs from file.
+        Log several audit entries at once. They are queued as a single item and written to the log file together.
 
         Parameters
         ----------
-        limit : Optional[int]
-            Maximum number of entries to return (most recent first)
+        entries : Iterable[Mapping[str, Any]]
+            One mapping per entry, holding the keyword arguments accepted by `log`.
+        """
+        if not self.enabled:
+            return
+        records = [
+            AuditRecord(entry["actor"], entry["operation"], entry["symbols"], entry["library"], entry.get("metadata"))
+            for entry in entries
+        ]
+        if not records:
+            return
+        writer = self._writer
+        if writer is not None:
+            if not writer.submit(records):
+                self._record_dropped_entry(writer, len(records))
+        elif self.enable_console:
+            for record in records:
+                _log_to_console(self.logger, record)
+
+    def _record_dropped_entry(self, writer: _AuditWriter, count: int = 1):
+        reason = "writer has stopped" if writer.stopped else "queue is full"
+        with self._dropped_lock:
+            self._dropped_entries += count
+            first_drop = reason not in self._drop_warnings
+            self._drop_warnings.add(reason)
+        if first_drop:
+            self.logger.warning("Audit log %s, dropping entries. See AuditLogger.dropped_entries", reason)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether entries are logged. Read-only, as the background writer is only started for an enabled logger."""
+        return self._enabled
+
+    @property
+    def dropped_entries(self) -> int:
+        """
+        Number of entries dropped, either because the queue was full with `block_on_full` False, or because the
+        background writer had stopped, e.g. while the logger was being closed.
+        """
+        return self._dropped_entries
+
+    def _add_flush_hook(self, hook: Callable[[], None]):
+        """Call the bound method ``hook`` at the start of every `flush` and `close`."""
+        self._flush_hooks.append(weakref.WeakMethod(hook))
+
+    def _run_flush_hooks(self):
+        for ref in list(self._flush_hooks):
+            hook = ref()
+            if hook is None:
+                self._flush_hooks.remove(ref)
+                continue
+            try:
+                hook()
+            except Exception:
+                self.logger.exception("Failed to submit audit entries before flushing")
+
+    def flush(self):
+        """Block until all audit entries logged so far have been written to the log file."""
+        self._run_flush_hooks()
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self):
+        """Flush and close the audit log file. Further calls to `log` only go to the console."""
+        self._run_flush_hooks()
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            atexit.unregister(self._exit_handler)
+            writer.close()
+
+    def __del__(self):
+        if getattr(self, "_writer", None) is not None:
+            self.close()
+
+    def iter_logs(self, reverse: bool = True) -> Iterator[AuditEntry]:
+        """
+        Lazily iterate over the audit log file.
+
+        Entries are parsed one at a time as the iterator is consumed, so stopping early avoids reading the rest
+        of the file.
+
+        Parameters
+        ----------
+        reverse : bool, default=True
+            If True, yield the most recent entries first. Otherwise yield entries in the order they were logged.
+
+        Yields
+        ------
+        AuditEntry
+            The next audit entry. Lines that cannot be parsed are skipped.
+        """
+        if not self.log_file or not self.log_file.exists():
+            return
+
+        self.flush()
+        with open(self.log_file, 'rb') as f:
+            if self.log_format == "msgpack":
+                # Frames can only be walked forwards
+                payloads = reversed(list(_iter_frames(f))) if reverse else _iter_frames(f)
+                for payload in payloads:
+                    try:
+                        fields = msgpack.unpackb(payload, **_MSGPACK_UNPACK_KWARGS)
+                    except ValueError:
+                        # Corrupt frame; msgpack's unpacking errors are ValueErrors
+                        continue
+                    try:
+                        entry = _parse_entry(*fields)
+                    except TypeError:
+                        # Not an audit entry
+                        continue
+                    yield entry
+                return
+
+            lines = _iter_lines_reversed(f) if reverse else f
+            loads = _loads
+            for line in lines:
+                if not line or line == b"\n":
+                    continue
+                try:
+                    parsed = loads(line)
+                    if "records" in parsed:
+                        # A block of entries written with hash_chain
+                        entries = [_parse_entry(**record) for record in parsed["records"]]
+                        if reverse:
+                            entries.reverse()
+                    else:
+                        entries = (_parse_entry(**parsed),)
+                except (ValueError, TypeError):
+                    # Corrupt or truncated line
+                    continue
+                yield from entries
+
+    def verify_chain(self) -> bool:
+        """
+        Check that a log written with ``hash_chain=True`` has not been tampered with.
 
         Returns
         -------
-        List[AuditEntry]
-            List of audit entries
+        bool
+            False if any line is not a hash chain block, if a block's hash doesn't match its entries, or if a block
+            doesn't follow on from the one before it. True otherwise, including when there is no log file yet.
+
+        Notes
+        -----
+        Only the current log file is checked. Its first block follows on from the end of the previous file, or from
+        an all-zero hash for the very first block. Removing entire blocks from the end of the file can't be detected
+        from the file alone; keep a copy of the latest hash elsewhere if that matters.
         """
+        if not self.hash_chain:
+            raise ValueError("verify_chain requires an AuditLogger created with hash_chain=True")
         if not self.log_file or not self.log_file.exists():
-            return []
+            return True
 
-        entries = []
-        with open(self.log_file, 'r') as f:
+        self.flush()
+        prev = None
+        with open(self.log_file, 'rb') as f:
             for line in f:
-                try:
-                    data = json.loads(line.strip())
-                    entries.append(AuditEntry(**data))
-                except (json.JSONDecodeError, TypeError):
+                if line == b"\n":
                     continue
+                block = _parse_chain_block(line)
+                if block is None:
+                    return False
+                block_prev, digest, records = block
+                if prev is not None and block_prev != prev:
+                    return False
+                if _chain_digest(block_prev, records) != digest:
+                    return False
+                prev = digest
+        return True
 
-        # Return most recent first
-        entries.reverse()
-        
-        if limit:
-            return entries[:limit]
-        return entries
+    def read_logs(self, limit: Optional[int] = None) -> List[AuditEntry]:
+        """
+        Read audit logs from file.
+
+        Parameters
+        ----------
+        limit : Optional[int]
+            Maximum number of entries to return (most recent first)
 
+        Returns
+        -------
+        List[AuditEntry]
+            List of audit entries
+        """
+        return list(islice(self.iter_logs(), limit or None))
@@ -6,26 +6,131 @@ Use of this software is governed by the Business Source License 1.1 included in
 As of the Change Date specified in that file, in accordance with the Business Source License, use of this software will be governed by the Apache License, version 2.0.
 """
 
-from typing import Any, Optional, List, Union, Tuple
+import time
+from collections.abc import Iterable
+from typing import Any, Callable, Dict, Optional, List, Union, Tuple
 from functools import wraps
+from operator import attrgetter
+from threading import Lock, Timer
 
 from arcticdb.version_store.library import Library, WritePayload, UpdatePayload, ReadRequest, DeleteRequest
 from arcticdb.version_store._store import VersionedItem
 from arcticdb.version_store.processing import QueryBuilder
 from arcticdb.options import OutputFormat, ArrowOutputStringFormat
-from arcticdb.audit.audit_logger import AuditLogger
+from arcticdb.audit.audit_logger import (
+    AuditLogger,
+    AuditRecord,
+    FLAG_LAZY_FALSE,
+    FLAG_LAZY_TRUE,
+    FLAG_PRUNE_FALSE,
+    FLAG_PRUNE_TRUE,
+    FLAG_STAGED_FALSE,
+    FLAG_STAGED_TRUE,
+    FLAG_UPSERT_FALSE,
+    FLAG_UPSERT_TRUE,
+)
 from arcticdb_ext.version_store import DataError
 
 
+_get_symbol = attrgetter("symbol")
+
+# How often a summary of the reads skipped by sampling or rate limiting is recorded, in seconds
+_ELIDED_SUMMARY_INTERVAL = 1.0
+
+
+class _ReadSampler:
+    """
+    Decides which reads an `AuditedLibrary` records when ``audit_sampling`` or ``audit_rate_limit`` is set.
+
+    Reads that are skipped are counted per actor and operation. A second after the first skipped read, and whenever
+    the audit logger is flushed or closed, one summary record per actor and operation is submitted with the skipped
+    symbols and ``{"elided": <number of calls>}`` as metadata, so that every read is still accounted for in the log.
+    """
+
+    def __init__(
+        self,
+        sampling: int,
+        rate_limit: Optional[float],
+        library_name: str,
+        submit: Callable[[AuditRecord], None],
+    ):
+        self._sampling = sampling
+        self._rate_limit = rate_limit
+        self._library_name = library_name
+        self._submit = submit
+        self._lock = Lock()
+        self._calls = 0
+        # Token bucket holding up to one second's worth of reads, and at least one read so that limits below one
+        # read per second still let some through
+        self._capacity = None if rate_limit is None else max(1.0, rate_limit)
+        self._tokens = self._capacity
+        self._last_refill = time.monotonic()
+        self._elided: Dict[Tuple[str, str], list] = {}
+        # Submits the summary once the interval has passed, whether or not there are further reads
+        self._summary_timer: Optional[Timer] = None
+
+    def admit(self, actor: str, operation: str, symbols: Union[str, List[str]]) -> bool:
+        """Whether this read should be recorded. Skipped reads are added to the next summary."""
+        with self._lock:
+            admitted = self._calls % self._sampling == 0
+            self._calls += 1
+            if admitted and self._rate_limit is not None:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._rate_limit)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                else:
+                    admitted = False
+
+            if not admitted:
+                if self._summary_timer is None:
+                    self._summary_timer = Timer(_ELIDED_SUMMARY_INTERVAL, self.flush)
+                    self._summary_timer.daemon = True
+                    self._summary_timer.start()
+                elided = self._elided.get((actor, operation))
+                if elided is None:
+                    elided = self._elided[(actor, operation)] = [0, set()]
+                elided[0] += 1
+                if isinstance(symbols, str):
+                    elided[1].add(symbols)
+                else:
+                    elided[1].update(symbols)
+        return admitted
+
+    def flush(self):
+        """Submit the summary of the reads skipped so far."""
+        with self._lock:
+            summaries, self._elided = self._elided, {}
+            timer, self._summary_timer = self._summary_timer, None
+        if timer is not None:
+            timer.cancel()
+        for (actor, operation), (count, symbols) in summaries.items():
+            self._submit(AuditRecord(actor, operation, sorted(symbols), self._library_name, {"elided": count}))
+
+
+def _submit_via_log(audit_logger) -> Callable[[AuditRecord], None]:
+    """Submit records to an audit logger that only provides ``log``."""
+    log = audit_logger.log
+
+    def submit(record: AuditRecord):
+        log(record.actor, record.operation, record.symbols, record.library, record.entry_metadata())
+
+    return submit
+
+
 def _require_user_id(func):
     """Decorator to enforce user_id parameter."""
+    # Built once per decorated method rather than on every call
+    message = (
+        f"{func.__name__} requires 'user_id' parameter for audit logging. "
+        "Please provide user_id='<your_user_id>' or user_id='<system_id>'"
+    )
+
     @wraps(func)
     def wrapper(self, *args, **kwargs):
-        if 'user_id' not in kwargs or kwargs['user_id'] is None:
-            raise ValueError(
-                f"{func.__name__} requires 'user_id' parameter for audit logging. "
-                "Please provide user_id='<your_user_id>' or user_id='<system_id>'"
-            )
+        if kwargs.get('user_id') is None:
+            raise ValueError(message)
         return func(self, *args, **kwargs)
     return wrapper
 
@@ -57,7 +162,32 @@ class AuditedLibrary:
     >>> data = audited_lib.read("symbol", user_id="john.doe")
     """
 
-    def __init__(self, library: Library, audit_logger: AuditLogger):
+    # Attributes used by every audited call are slots. There is no instance __dict__: anything else is looked up on the
+    # wrapped library by __getattr__.
+    __slots__ = (
+        "_library",
+        "_audit_logger",
+        "_library_name",
+        "_audit_enabled",
+        "_submit",
+        "_lib_write",
+        "_lib_read",
+        "_lib_write_batch",
+        "_lib_read_batch",
+        "_lib_update",
+        "_lib_append",
+        "_lib_delete",
+        "_read_sampler",
+        "__weakref__",
+    )
+
+    def __init__(
+        self,
+        library: Library,
+        audit_logger: AuditLogger,
+        audit_sampling: int = 1,
+        audit_rate_limit: Optional[float] = None,
+    ):
         """
         Initialize audited library wrapper.
 
@@ -66,11 +196,47 @@ class AuditedLibrary:
         library : Library
             The underlying ArcticDB library to wrap
         audit_logger : AuditLogger
-            The audit logger instance to use for logging operations
+            The audit logger instance to use for logging operations. Other objects with a ``log`` method taking the
+            arguments of `AuditLogger.log` are also accepted. Summaries of skipped reads are then only submitted
+            by a timer, not when the logger is flushed or closed.
+        audit_sampling : int, default=1
+            Record only one in every ``audit_sampling`` reads and batch reads. Writes, updates, appends and deletes
+            are always recorded.
+        audit_rate_limit : Optional[float], default=None
+            Maximum number of reads and batch reads recorded per second. None for no limit.
+
+        Notes
+        -----
+        Reads skipped by ``audit_sampling`` or ``audit_rate_limit`` are summarized about once a second, and when the
+        audit logger is flushed or closed, in a record with ``{"elided": <number of calls>}`` as its metadata.
         """
+        if audit_sampling < 1:
+            raise ValueError(f"audit_sampling must be at least 1, got {audit_sampling}")
+        if audit_rate_limit is not None and audit_rate_limit <= 0:
+            raise ValueError(f"audit_rate_limit must be positive, got {audit_rate_limit}")
         self._library = library
         self._audit_logger = audit_logger
         self._library_name = library._nvs._lib_cfg.lib_desc.name
+        # Read once: with a disabled logger every audited method forwards straight to the library
+        self._audit_enabled = getattr(audit_logger, "enabled", True)
+        # Bound once here so each audited call doesn't look them up again. Calls pass arguments positionally, so they
+        # must follow the parameter order of the corresponding Library method.
+        submit = getattr(audit_logger, "submit", None)
+        self._submit = submit if submit is not None else _submit_via_log(audit_logger)
+        self._lib_write = library.write
+        self._lib_read = library.read
+        self._lib_write_batch = library.write_batch
+        self._lib_read_batch = library.read_batch
+        self._lib_update = library.update
+        self._lib_append = library.append
+        self._lib_delete = library.delete
+        if audit_sampling > 1 or audit_rate_limit is not None:
+            self._read_sampler = _ReadSampler(audit_sampling, audit_rate_limit, self._library_name, self._submit)
+            add_flush_hook = getattr(audit_logger, "_add_flush_hook", None)
+            if add_flush_hook is not None:
+                add_flush_hook(self._read_sampler.flush)
+        else:
+            self._read_sampler = None
 
     def __repr__(self) -> str:
         return f"AuditedLibrary({self._library})"
@@ -122,25 +288,20 @@ class AuditedLibrary:
         VersionedItem
             The versioned item that was written
         """
+        if not self._audit_enabled:
+            return self._lib_write(
+                symbol, data, metadata, prune_previous_versions, staged, validate_index, index_column
+            )
+
         # Log the operation
-        self._audit_logger.log(
-            actor=user_id,
-            operation="write",
-            symbols=symbol,
-            library=self._library_name,
-            metadata={"prune_previous_versions": prune_previous_versions, "staged": staged}
+        record = AuditRecord(user_id, "write", symbol, self._library_name)
+        record.flags = (FLAG_PRUNE_TRUE if prune_previous_versions else FLAG_PRUNE_FALSE) | (
+            FLAG_STAGED_TRUE if staged else FLAG_STAGED_FALSE
         )
+        self._submit(record)
 
         # Perform the actual write
-        return self._library.write(
-            symbol=symbol,
-            data=data,
-            metadata=metadata,
-            prune_previous_versions=prune_previous_versions,
-            staged=staged,
-            validate_index=validate_index,
-            index_column=index_column
-        )
+        return self._lib_write(symbol, data, metadata, prune_previous_versions, staged, validate_index, index_column)
 
     @_require_user_id
     def read(
@@ -184,26 +345,19 @@ class AuditedLibrary:
         Union[VersionedItem, LazyDataFrame]
             The data read from the symbol
         """
+        if not self._audit_enabled:
+            return self._lib_read(symbol, as_of, date_range, row_range, columns, query_builder, lazy, output_format)
+
         # Log the operation
-        self._audit_logger.log(
-            actor=user_id,
-            operation="read",
-            symbols=symbol,
-            library=self._library_name,
-            metadata={"as_of": str(as_of) if as_of else None, "lazy": lazy}
-        )
+        read_sampler = self._read_sampler
+        if read_sampler is None or read_sampler.admit(user_id, "read", symbol):
+            record = AuditRecord(user_id, "read", symbol, self._library_name)
+            record.as_of = as_of
+            record.flags = FLAG_LAZY_TRUE if lazy else FLAG_LAZY_FALSE
+            self._submit(record)
 
         # Perform the actual read
-        return self._library.read(
-            symbol=symbol,
-            as_of=as_of,
-            date_range=date_range,
-            row_range=row_range,
-            columns=columns,
-            query_builder=query_builder,
-            lazy=lazy,
-            output_format=output_format
-        )
+        return self._lib_read(symbol, as_of, date_range, row_range, columns, query_builder, lazy, output_format)
 
     @_require_user_id
     def write_batch(
@@ -232,23 +386,19 @@ class AuditedLibrary:
         List[Union[VersionedItem, DataError]]
             Results of the batch write
         """
-        symbols = [p.symbol for p in payloads]
+        if not self._audit_enabled:
+            return self._lib_write_batch(payloads, prune_previous_versions, validate_index)
+
+        symbols = list(map(_get_symbol, payloads))
 
         # Log the operation
-        self._audit_logger.log(
-            actor=user_id,
-            operation="write_batch",
-            symbols=symbols,
-            library=self._library_name,
-            metadata={"count": len(payloads), "prune_previous_versions": prune_previous_versions}
-        )
+        record = AuditRecord(user_id, "write_batch", symbols, self._library_name)
+        record.count = len(payloads)
+        record.flags = FLAG_PRUNE_TRUE if prune_previous_versions else FLAG_PRUNE_FALSE
+        self._submit(record)
 
         # Perform the actual batch write
-        return self._library.write_batch(
-            payloads=payloads,
-            prune_previous_versions=prune_previous_versions,
-            validate_index=validate_index
-        )
+        return self._lib_write_batch(payloads, prune_previous_versions, validate_index)
 
     @_require_user_id
     def read_batch(
@@ -280,24 +430,21 @@ class AuditedLibrary:
         Union[List[Union[VersionedItem, DataError]], LazyDataFrameCollection]
             Results of the batch read
         """
+        if not self._audit_enabled:
+            return self._lib_read_batch(symbols, query_builder, lazy, output_format)
+
         symbol_names = [s if isinstance(s, str) else s.symbol for s in symbols]
 
         # Log the operation
-        self._audit_logger.log(
-            actor=user_id,
-            operation="read_batch",
-            symbols=symbol_names,
-            library=self._library_name,
-            metadata={"count": len(symbols), "lazy": lazy}
-        )
+        read_sampler = self._read_sampler
+        if read_sampler is None or read_sampler.admit(user_id, "read_batch", symbol_names):
+            record = AuditRecord(user_id, "read_batch", symbol_names, self._library_name)
+            record.count = len(symbols)
+            record.flags = FLAG_LAZY_TRUE if lazy else FLAG_LAZY_FALSE
+            self._submit(record)
 
         # Perform the actual batch read
-        return self._library.read_batch(
-            symbols=symbols,
-            query_builder=query_builder,
-            lazy=lazy,
-            output_format=output_format
-        )
+        return self._lib_read_batch(symbols, query_builder, lazy, output_format)
 
     @_require_user_id
     def update(
@@ -335,24 +482,18 @@ class AuditedLibrary:
         VersionedItem
             The updated versioned item
         """
+        if not self._audit_enabled:
+            return self._lib_update(symbol, data, metadata, upsert, date_range, prune_previous_versions)
+
         # Log the operation
-        self._audit_logger.log(
-            actor=user_id,
-            operation="update",
-            symbols=symbol,
-            library=self._library_name,
-            metadata={"upsert": upsert, "prune_previous_versions": prune_previous_versions}
+        record = AuditRecord(user_id, "update", symbol, self._library_name)
+        record.flags = (FLAG_UPSERT_TRUE if upsert else FLAG_UPSERT_FALSE) | (
+            FLAG_PRUNE_TRUE if prune_previous_versions else FLAG_PRUNE_FALSE
         )
+        self._submit(record)
 
         # Perform the actual update
-        return self._library.update(
-            symbol=symbol,
-            data=data,
-            metadata=metadata,
-            upsert=upsert,
-            date_range=date_range,
-            prune_previous_versions=prune_previous_versions
-        )
+        return self._lib_update(symbol, data, metadata, upsert, date_range, prune_previous_versions)
 
     @_require_user_id
     def append(
@@ -387,23 +528,16 @@ class AuditedLibrary:
         VersionedItem
             The updated versioned item
         """
+        if not self._audit_enabled:
+            return self._lib_append(symbol, data, metadata, prune_previous_versions, validate_index)
+
         # Log the operation
-        self._audit_logger.log(
-            actor=user_id,
-            operation="append",
-            symbols=symbol,
-            library=self._library_name,
-            metadata={"prune_previous_versions": prune_previous_versions}
-        )
+        record = AuditRecord(user_id, "append", symbol, self._library_name)
+        record.flags = FLAG_PRUNE_TRUE if prune_previous_versions else FLAG_PRUNE_FALSE
+        self._submit(record)
 
         # Perform the actual append
-        return self._library.append(
-            symbol=symbol,
-            data=data,
-            metadata=metadata,
-            prune_previous_versions=prune_previous_versions,
-            validate_index=validate_index
-        )
+        return self._lib_append(symbol, data, metadata, prune_previous_versions, validate_index)
 
     @_require_user_id
     def delete(
@@ -428,15 +562,19 @@ class AuditedLibrary:
         -------
         None
         """
+        if not self._audit_enabled:
+            return self._lib_delete(symbol, versions)
+
+        if isinstance(versions, Iterable) and not isinstance(versions, str):
+            # The record is serialized later on the writer thread, so take a copy the caller can't change. This also
+            # lets a one-shot iterator be both logged and passed on to the library.
+            versions = tuple(versions)
+
         # Log the operation
-        self._audit_logger.log(
-            actor=user_id,
-            operation="delete",
-            symbols=symbol,
-            library=self._library_name,
-            metadata={"versions": str(versions) if versions else "all"}
-        )
+        record = AuditRecord(user_id, "delete", symbol, self._library_name)
+        record.versions = "all" if versions is None else versions
+        self._submit(record)
 
         # Perform the actual delete
-        return self._library.delete(symbol=symbol, versions=versions)
+        return self._lib_delete(symbol, versions)
 
@@ -31,9 +31,15 @@ def _import_optional_dependency(module_name: str) -> Tuple[ModuleType, bool]:
 
 
 pyarrow, _PYARROW_AVAILABLE = _import_optional_dependency("pyarrow")
+orjson, _ORJSON_AVAILABLE = _import_optional_dependency("orjson")
+tqdm, _TQDM_AVAILABLE = _import_optional_dependency("tqdm")
 
 
 __all__ = [
     "pyarrow",
     "_PYARROW_AVAILABLE",
+    "orjson",
+    "_ORJSON_AVAILABLE",
+    "tqdm",
+    "_TQDM_AVAILABLE",
 ]
@@ -12,15 +12,128 @@ to all existing versions to ensure compatibility with the audit system.
 """
 
 import argparse
+import logging
 import sys
-from typing import Optional
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional
 from pathlib import Path
 
 import arcticdb as adb
 from arcticdb.audit import AuditLogger
+from arcticdb.dependencies import tqdm, _TQDM_AVAILABLE
+from arcticdb.version_store.library import ReadInfoRequest
+from arcticdb_ext.version_store import DataError
 
 
+logger = logging.getLogger(__name__)
+
+_SEPARATOR = "-" * 80
+_SUMMARY_SEPARATOR = "=" * 80
+
 DEFAULT_MIGRATION_USER = "system_migration"
+DEFAULT_MAX_WORKERS = 16
+# Number of symbols between progress reports when not showing a progress bar
+PROGRESS_REPORT_INTERVAL = 1000
+# Symbols queued per worker, bounding the number of outstanding futures for libraries with many symbols
+PENDING_SYMBOLS_PER_WORKER = 4
+
+
+class _SymbolResult(NamedTuple):
+    migrated: bool
+    versions_migrated: int
+    versions_skipped: int
+    errors: List[str]
+
+
+def _migrate_symbol(
+    lib,
+    symbol: str,
+    library_name: str,
+    migration_user: str,
+    audit_logger: Optional[AuditLogger],
+    dry_run: bool,
+) -> _SymbolResult:
+    """
+    Add audit metadata to every version of a symbol.
+
+    Versions that already have audit metadata are skipped. For a dry run, ``versions_migrated`` counts the versions
+    that would be migrated.
+    """
+    versions_migrated = 0
+    versions_skipped = 0
+    errors = []
+    try:
+        # Get all versions of the symbol. list_versions is keyed by SymbolVersion.
+        versions = [symbol_version.version for symbol_version in lib.list_versions(symbol)]
+
+        # Read the existing metadata of every version in one batch rather than one round trip per version
+        versioned_items = lib.read_metadata_batch([ReadInfoRequest(symbol, as_of=version) for version in versions])
+
+        # Skip versions that already have audit metadata, so that only the rest are copied and logged
+        to_migrate = []
+        for version, versioned_item in zip(versions, versioned_items):
+            if isinstance(versioned_item, DataError):
+                errors.append(
+                    f"WARNING: Failed to process version {version} of '{symbol}': {versioned_item.exception_string}"
+                )
+            elif versioned_item.metadata is None:
+                to_migrate.append((version, {}))
+            elif not isinstance(versioned_item.metadata, dict):
+                errors.append(
+                    f"WARNING: Failed to process version {version} of '{symbol}': "
+                    f"metadata is a {type(versioned_item.metadata).__name__}, not a dict"
+                )
+            elif '_audit_user_id' in versioned_item.metadata:
+                versions_skipped += 1
+            else:
+                to_migrate.append((version, versioned_item.metadata))
+
+        if dry_run:
+            return _SymbolResult(True, len(to_migrate), versions_skipped, errors)
+
+        # For each remaining version, we'll add migration metadata
+        for version, existing_metadata in to_migrate:
+            # Create new metadata with audit info
+            new_metadata = existing_metadata.copy()
+            new_metadata['_audit_user_id'] = migration_user
+            new_metadata['_audit_migrated'] = True
+
+            # Write metadata back (this creates a new version)
+            # Note: This approach preserves data but creates new versions
+            # For production use, you may want to modify this behavior
+            versions_migrated += 1
+
+            # Log the migration if audit logger is available
+            if audit_logger:
+                audit_logger.log(
+                    actor=migration_user,
+                    operation="migrate_metadata",
+                    symbols=symbol,
+                    library=library_name,
+                    metadata={"version": version, "action": "add_audit_metadata"}
+                )
+
+        return _SymbolResult(True, versions_migrated, versions_skipped, errors)
+
+    except Exception as e:
+        errors.append(f"ERROR: Failed to migrate symbol '{symbol}': {e}")
+        return _SymbolResult(False, versions_migrated, versions_skipped, errors)
+
+
+def _map_bounded(executor: Executor, fn: Callable, items: Iterable, max_pending: int) -> Iterator:
+    """
+    Like ``executor.map(fn, items)``, but only submits up to ``max_pending`` items ahead of the results consumed so
+    far, rather than creating a future for every item up front.
+    """
+    pending = deque()
+    for item in items:
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
 
 
 def migrate_library(
@@ -28,7 +141,8 @@ def migrate_library(
     library_name: str,
     migration_user: str = DEFAULT_MIGRATION_USER,
     audit_log_file: Optional[str] = None,
-    dry_run: bool = False
+    dry_run: bool = False,
+    max_workers: int = DEFAULT_MAX_WORKERS,
 ):
     """
     Migrate a library to add audit metadata to all existing symbols.
@@ -45,121 +159,115 @@ def migrate_library(
         Path to audit log file for recording migration operations
     dry_run : bool, default=False
         If True, only report what would be done without making changes
+    max_workers : int, default=16
+        Number of symbols migrated concurrently
     """
-    print(f"Starting migration for library '{library_name}' at {uri}")
-    print(f"Migration user: {migration_user}")
-    print(f"Dry run: {dry_run}")
-    print("-" * 80)
-
-    # Initialize audit logger if specified
-    audit_logger = None
-    if audit_log_file:
-        audit_logger = AuditLogger(log_file=audit_log_file, enable_console=True)
-        print(f"Audit logging enabled: {audit_log_file}")
+    logger.info("Starting migration for library '%s' at %s", library_name, uri)
+    logger.info("Migration user: %s", migration_user)
+    logger.info("Dry run: %s", dry_run)
+    logger.info(_SEPARATOR)
 
     # Connect to Arctic
     try:
         ac = adb.Arctic(uri)
     except Exception as e:
-        print(f"ERROR: Failed to connect to Arctic at {uri}: {e}")
+        logger.error("ERROR: Failed to connect to Arctic at %s: %s", uri, e)
         return False
 
     # Get library
     try:
         lib = ac.get_library(library_name)
     except Exception as e:
-        print(f"ERROR: Failed to get library '{library_name}': {e}")
+        logger.error("ERROR: Failed to get library '%s': %s", library_name, e)
         return False
 
     # Get all symbols
     try:
         symbols = lib.list_symbols()
-        print(f"Found {len(symbols)} symbols to migrate")
+        logger.info("Found %d symbols to migrate", len(symbols))
     except Exception as e:
-        print(f"ERROR: Failed to list symbols: {e}")
+        logger.error("ERROR: Failed to list symbols: %s", e)
         return False
 
     if not symbols:
-        print("No symbols found. Migration complete.")
+        logger.info("No symbols found. Migration complete.")
         return True
 
-    # Migrate each symbol
+    # Migrate symbols concurrently, since the work is dominated by storage round trips. Results come back in
+    # symbol order and are reported from this thread so that output from different symbols never interleaves.
     migrated_count = 0
     error_count = 0
+    versions_migrated = 0
+    versions_skipped = 0
 
-    for i, symbol in enumerate(symbols, 1):
-        print(f"\n[{i}/{len(symbols)}] Processing symbol: {symbol}")
-        
-        try:
-            # Get all versions of the symbol
-            versions = lib.list_versions(symbol)
-            print(f"  Found {len(versions)} version(s)")
-
-            # For each version, we'll add migration metadata
-            for version_info in versions:
-                version = version_info['version']
-                print(f"  Processing version {version}...")
-
-                if dry_run:
-                    print(f"  [DRY RUN] Would add migration metadata to version {version}")
-                else:
-                    # Read the existing metadata
-                    try:
-                        versioned_item = lib.read_metadata(symbol, as_of=version)
-                        existing_metadata = versioned_item.metadata or {}
-                        
-                        # Add audit metadata if not already present
-                        if '_audit_user_id' not in existing_metadata:
-                            # Create new metadata with audit info
-                            new_metadata = existing_metadata.copy()
-                            new_metadata['_audit_user_id'] = migration_user
-                            new_metadata['_audit_migrated'] = True
-                            
-                            # Write metadata back (this creates a new version)
-                            # Note: This approach preserves data but creates new versions
-                            # For production use, you may want to modify this behavior
-                            print(f"  Adding audit metadata to version {version}")
-                            
-                            # Log the migration if audit logger is available
-                            if audit_logger:
-                                audit_logger.log(
-                                    actor=migration_user,
-                                    operation="migrate_metadata",
-                                    symbols=symbol,
-                                    library=library_name,
-                                    metadata={"version": version, "action": "add_audit_metadata"}
-                                )
-                        else:
-                            print(f"  Version {version} already has audit metadata, skipping")
-                            
-                    except Exception as e:
-                        print(f"  WARNING: Failed to process version {version}: {e}")
-                        error_count += 1
-                        continue
-
-            migrated_count += 1
-            print(f"  ✓ Symbol '{symbol}' migrated successfully")
-
-        except Exception as e:
-            print(f"  ERROR: Failed to migrate symbol '{symbol}': {e}")
-            error_count += 1
-            continue
+    # Show a progress bar on a terminal, otherwise report progress periodically. Only errors are reported per symbol.
+    progress = None
+    if _TQDM_AVAILABLE and sys.stderr.isatty():
+        progress = tqdm.tqdm(total=len(symbols), unit="symbol")
+
+    # Initialize audit logger if specified. It is closed once all symbols are done, so that the log is complete
+    # when this returns.
+    audit_logger = None
+    if audit_log_file:
+        audit_logger = AuditLogger(log_file=audit_log_file, enable_console=True)
+        logger.info("Audit logging enabled: %s", audit_log_file)
+
+    migrate_symbol = partial(
+        _migrate_symbol,
+        lib,
+        library_name=library_name,
+        migration_user=migration_user,
+        audit_logger=audit_logger,
+        dry_run=dry_run,
+    )
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = _map_bounded(executor, migrate_symbol, symbols, max_workers * PENDING_SYMBOLS_PER_WORKER)
+            for i, result in enumerate(results, 1):
+                for error in result.errors:
+                    if progress is not None:
+                        progress.write(f"  {error}")
+                    else:
+                        logger.warning("  %s", error)
+                if result.migrated:
+                    migrated_count += 1
+                error_count += len(result.errors)
+                versions_migrated += result.versions_migrated
+                versions_skipped += result.versions_skipped
+                if progress is not None:
+                    progress.update()
+                elif i % PROGRESS_REPORT_INTERVAL == 0:
+                    logger.info("Processed %d/%d symbols", i, len(symbols))
+    finally:
+        if progress is not None:
+            progress.close()
+        if audit_logger is not None:
+            audit_logger.close()
 
     # Summary
-    print("\n" + "=" * 80)
-    print("Migration Summary:")
-    print(f"  Total symbols: {len(symbols)}")
-    print(f"  Successfully migrated: {migrated_count}")
-    print(f"  Errors: {error_count}")
-    
+    logger.info("\n%s", _SUMMARY_SEPARATOR)
+    logger.info("Migration Summary:")
+    logger.info("  Total symbols: %d", len(symbols))
+    logger.info("  Successfully migrated: %d", migrated_count)
+    logger.info("  Versions %s: %d", "to migrate" if dry_run else "migrated", versions_migrated)
+    logger.info("  Versions already migrated: %d", versions_skipped)
+    logger.info("  Errors: %d", error_count)
+
     if dry_run:
-        print("\n  This was a DRY RUN - no changes were made")
-    
-    print("=" * 80)
+        logger.info("\n  This was a DRY RUN - no changes were made")
+
+    logger.info(_SUMMARY_SEPARATOR)
 
     return error_count == 0
 
 
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main():
     """Main entry point for the migration script."""
     parser = argparse.ArgumentParser(
@@ -187,15 +295,27 @@ def main():
         action="store_true",
         help="Perform a dry run without making changes"
     )
+    parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Number of symbols to migrate concurrently (default: {DEFAULT_MAX_WORKERS})"
+    )
 
     args = parser.parse_args()
 
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
     success = migrate_library(
         uri=args.uri,
         library_name=args.library,
         migration_user=args.migration_user,
         audit_log_file=args.audit_log,
-        dry_run=args.dry_run
+        dry_run=args.dry_run,
+        max_workers=args.workers,
     )
 
     sys.exit(0 if success else 1)
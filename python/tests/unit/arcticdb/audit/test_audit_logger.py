@@ -0,0 +1,271 @@
+import datetime
+import enum
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+
+import msgpack
+
+import arcticdb.audit.audit_logger as audit_logger_module
+from arcticdb.audit import AuditLogger, AuditRecord
+
+
+def _log_block(audit_logger, actor, n):
+    """Write ``n`` entries from ``actor`` as a single batch, and so as a single hash chain block."""
+    audit_logger.log_many(
+        {"actor": actor, "operation": "write", "symbols": f"sym_{i}", "library": "lib"} for i in range(n)
+    )
+    audit_logger.flush()
+
+
+def _chained_logger(path):
+    return AuditLogger(str(path), enable_console=False, hash_chain=True)
+
+
+def _write_chain(path, actors=("alice", "bob", "carol")):
+    audit_logger = _chained_logger(path)
+    for actor in actors:
+        _log_block(audit_logger, actor, 2)
+    audit_logger.close()
+    return audit_logger
+
+
+def test_hash_chain_valid(tmp_path):
+    path = tmp_path / "audit.log"
+    audit_logger = _write_chain(path)
+
+    lines = path.read_bytes().splitlines()
+    assert len(lines) == 3
+    blocks = [json.loads(line) for line in lines]
+    assert blocks[0]["prev"] == "0" * 64
+    assert [block["prev"] for block in blocks[1:]] == [block["hash"] for block in blocks[:-1]]
+    assert audit_logger.verify_chain()
+    assert [entry.actor for entry in audit_logger.read_logs()] == ["carol"] * 2 + ["bob"] * 2 + ["alice"] * 2
+
+
+def test_hash_chain_detects_tampered_record(tmp_path):
+    path = tmp_path / "audit.log"
+    audit_logger = _write_chain(path)
+
+    path.write_bytes(path.read_bytes().replace(b'"actor":"bob"', b'"actor":"eve"', 1))
+
+    assert not audit_logger.verify_chain()
+
+
+def test_hash_chain_detects_reordered_blocks(tmp_path):
+    path = tmp_path / "audit.log"
+    audit_logger = _write_chain(path)
+
+    first, middle, last = path.read_bytes().splitlines(keepends=True)
+    path.write_bytes(first + last + middle)
+
+    assert not audit_logger.verify_chain()
+
+
+def test_hash_chain_detects_removed_middle_block(tmp_path):
+    path = tmp_path / "audit.log"
+    audit_logger = _write_chain(path)
+
+    first, _, last = path.read_bytes().splitlines(keepends=True)
+    path.write_bytes(first + last)
+
+    assert not audit_logger.verify_chain()
+
+
+def test_hash_chain_continues_after_restart(tmp_path):
+    path = tmp_path / "audit.log"
+    _write_chain(path, actors=("alice",))
+    last_hash = json.loads(path.read_bytes().splitlines()[-1])["hash"]
+
+    audit_logger = _chained_logger(path)
+    _log_block(audit_logger, "bob", 1)
+    audit_logger.close()
+
+    blocks = [json.loads(line) for line in path.read_bytes().splitlines()]
+    assert len(blocks) == 2
+    assert blocks[1]["prev"] == last_hash
+    assert audit_logger.verify_chain()
+
+
+def test_hash_chain_continues_across_rotation(tmp_path):
+    path = tmp_path / "audit.log"
+    audit_logger = AuditLogger(str(path), enable_console=False, hash_chain=True, max_bytes=1)
+    _log_block(audit_logger, "alice", 2)
+    _log_block(audit_logger, "bob", 2)
+    audit_logger.close()
+
+    # Each block fills a file, so each ends up in its own rotated file
+    rotated = sorted(p for p in tmp_path.iterdir() if p.name.startswith("audit.log."))
+    blocks = [json.loads(p.read_bytes()) for p in rotated]
+    assert len(blocks) == 2
+    assert blocks[0]["prev"] == "0" * 64
+    assert blocks[1]["prev"] == blocks[0]["hash"]
+
+
+def test_read_logs_limit_spans_hash_chain_blocks(tmp_path):
+    path = tmp_path / "audit.log"
+    audit_logger = _chained_logger(path)
+    _log_block(audit_logger, "alice", 3)
+    _log_block(audit_logger, "bob", 3)
+    audit_logger.close()
+
+    entries = audit_logger.read_logs(limit=4)
+
+    assert [(entry.actor, entry.symbols) for entry in entries] == [
+        ("bob", ["sym_2"]),
+        ("bob", ["sym_1"]),
+        ("bob", ["sym_0"]),
+        ("alice", ["sym_2"]),
+    ]
+
+
+def test_read_logs_tail_scan_across_chunks(tmp_path, monkeypatch):
+    # Small enough that every line is split across several chunks
+    monkeypatch.setattr(audit_logger_module, "_TAIL_CHUNK_SIZE", 7)
+    audit_logger = AuditLogger(str(tmp_path / "audit.log"), enable_console=False)
+    for i in range(20):
+        audit_logger.log("user", "read", f"sym_{i}", "lib")
+    audit_logger.close()
+
+    entries = audit_logger.read_logs()
+
+    assert [entry.symbols for entry in entries] == [[f"sym_{i}"] for i in reversed(range(20))]
+    assert [entry.symbols for entry in audit_logger.read_logs(limit=3)] == [["sym_19"], ["sym_18"], ["sym_17"]]
+    assert list(audit_logger.iter_logs(reverse=False)) == entries[::-1]
+
+
+def test_rotation(tmp_path):
+    path = tmp_path / "audit.log"
+    audit_logger = AuditLogger(str(path), enable_console=False, max_bytes=1)
+    audit_logger.log("user", "write", "first", "lib")
+    audit_logger.flush()
+    audit_logger.close()
+
+    rotated = [p for p in tmp_path.iterdir() if p.name.startswith("audit.log.")]
+    assert len(rotated) == 1
+    assert json.loads(rotated[0].read_bytes())["symbols"] == ["first"]
+    assert path.read_bytes() == b""
+
+
+def test_msgpack_roundtrip(tmp_path):
+    path = tmp_path / "audit.log"
+    audit_logger = AuditLogger(str(path), enable_console=False, log_format="msgpack")
+    audit_logger.log("alice", "write", "a", "lib", {"note": "first"})
+    audit_logger.log("bob", "read", ["b", "c"], "lib")
+    audit_logger.close()
+
+    entries = audit_logger.read_logs()
+
+    assert [(entry.actor, entry.operation, entry.symbols, entry.metadata) for entry in entries] == [
+        ("bob", "read", ["b", "c"], None),
+        ("alice", "write", ["a"], {"note": "first"}),
+    ]
+    assert list(audit_logger.iter_logs(reverse=False)) == entries[::-1]
+
+
+def test_msgpack_ignores_truncated_trailing_frame(tmp_path):
+    path = tmp_path / "audit.log"
+    audit_logger = AuditLogger(str(path), enable_console=False, log_format="msgpack")
+    audit_logger.log("alice", "write", "a", "lib")
+    audit_logger.close()
+
+    with open(path, "ab") as f:
+        f.write(audit_logger_module._FRAME_HEADER.pack(100) + msgpack.packb(["partial"]))
+
+    assert [entry.actor for entry in audit_logger.read_logs()] == ["alice"]
+
+
+def test_deduplicate_reads(tmp_path):
+    audit_logger = AuditLogger(str(tmp_path / "audit.log"), enable_console=False, deduplicate_reads=True)
+    read = {"actor": "user", "operation": "read", "symbols": "sym", "library": "lib"}
+    audit_logger.log_many(
+        [read, read, {"actor": "user", "operation": "write", "symbols": "sym", "library": "lib"}, read]
+    )
+    audit_logger.close()
+
+    entries = audit_logger.read_logs()[::-1]
+
+    assert [entry.operation for entry in entries] == ["read", "write"]
+    assert entries[0].metadata["repeated"] == 3
+    assert "last_timestamp" in entries[0].metadata
+    assert entries[1].metadata is None
+
+
+def test_record_flags(tmp_path):
+    audit_logger = AuditLogger(str(tmp_path / "audit.log"), enable_console=False)
+    record = AuditRecord("user", "write", "sym", "lib")
+    record.prune_previous_versions = False
+    record.staged = True
+    assert record.upsert is None
+    assert record.staged is True
+    audit_logger.submit(record)
+    audit_logger.close()
+
+    (entry,) = audit_logger.read_logs()
+
+    assert entry.metadata == {"prune_previous_versions": False, "staged": True}
+
+
+class _Colour(enum.Enum):
+    RED = "red"
+
+
+class _Level(enum.IntEnum):
+    HIGH = 2
+
+
+class _Float(float):
+    pass
+
+
+@dataclass
+class _Point:
+    x: int
+
+
+def test_json_encoding_does_not_depend_on_orjson():
+    metadata = {
+        "datetime": datetime.datetime(2024, 1, 1, 12, 30),
+        "aware_datetime": datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+        "date": datetime.date(2024, 1, 1),
+        "time": datetime.time(12, 30),
+        "uuid": uuid.UUID(int=1),
+        "enum": _Colour.RED,
+        "int_enum": _Level.HIGH,
+        "float_subclass": _Float(1.5),
+        "dataclass": _Point(1),
+        "set": {1},
+        "bytes": b"x",
+        1: "int key",
+    }
+
+    assert audit_logger_module._dumps(metadata) == audit_logger_module._json_dumps(metadata)
+
+
+def test_dropped_entries_after_writer_stops(tmp_path, caplog):
+    audit_logger = AuditLogger(str(tmp_path / "audit.log"), enable_console=False)
+    # Stop the writer while it is still attached to the logger, as when logging races with close()
+    audit_logger._writer.close()
+
+    with caplog.at_level(logging.WARNING, logger="arcticdb.audit"):
+        audit_logger.log("user", "read", "sym", "lib")
+        audit_logger.log_many([{"actor": "user", "operation": "read", "symbols": "sym", "library": "lib"}] * 2)
+
+    assert audit_logger.dropped_entries == 3
+    assert [record.getMessage() for record in caplog.records] == [
+        "Audit log writer has stopped, dropping entries. See AuditLogger.dropped_entries"
+    ]
+    audit_logger.close()
+
+
+def test_console_message_leaves_timestamp_to_formatter(caplog):
+    audit_logger = AuditLogger(enable_console=True)
+
+    with caplog.at_level(logging.INFO, logger="arcticdb.audit"):
+        audit_logger.log("user", "write", "sym", "lib", {"version": 1})
+        audit_logger.close()
+
+    assert [record.getMessage() for record in caplog.records] == [
+        "actor=user operation=write library=lib symbols=['sym'] metadata={'version': 1}"
+    ]
@@ -0,0 +1,326 @@
+import inspect
+import sys
+import threading
+import time
+from subprocess import run
+from types import SimpleNamespace
+from unittest.mock import MagicMock, create_autospec
+
+import pandas as pd
+import pytest
+
+import arcticdb.audit.audited_library as audited_library
+from arcticdb.audit import AuditedLibrary, AuditLogger, AuditRecord
+from arcticdb.audit.audited_library import _ReadSampler
+from arcticdb.version_store.library import Library, ReadRequest, WritePayload
+
+
+def test_read_sampler_sampling():
+    submitted = []
+    sampler = _ReadSampler(10, None, "lib", submitted.append)
+
+    admitted = sum(sampler.admit("user", "read", "sym") for _ in range(100))
+
+    assert admitted == 10
+    assert submitted == []
+    sampler.flush()
+    assert len(submitted) == 1
+    summary = submitted[0]
+    assert isinstance(summary, AuditRecord)
+    assert (summary.actor, summary.operation, summary.symbols, summary.library) == ("user", "read", ["sym"], "lib")
+    assert summary.metadata == {"elided": 90}
+
+
+def _freeze_clock(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(audited_library, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_read_sampler_rate_limit(monkeypatch):
+    clock = _freeze_clock(monkeypatch)
+    submitted = []
+    sampler = _ReadSampler(1, 50, "lib", submitted.append)
+
+    assert sum(sampler.admit("user", "read", "sym") for _ in range(100)) == 50
+    clock.now += 0.5
+    assert sum(sampler.admit("user", "read", "sym") for _ in range(100)) == 25
+    sampler.flush()
+    assert [record.metadata for record in submitted] == [{"elided": 125}]
+
+
+def test_read_sampler_rate_limit_below_one(monkeypatch):
+    clock = _freeze_clock(monkeypatch)
+    sampler = _ReadSampler(1, 0.5, "lib", lambda record: None)
+
+    assert sum(sampler.admit("user", "read", "sym") for _ in range(10)) == 1
+    clock.now += 1
+    assert not sampler.admit("user", "read", "sym")
+    clock.now += 1
+    assert sampler.admit("user", "read", "sym")
+    sampler.flush()
+
+
+def test_read_sampler_summary_groups_by_actor_and_operation():
+    submitted = []
+    sampler = _ReadSampler(2, None, "lib", submitted.append)
+
+    for _ in range(2):
+        sampler.admit("alice", "read", "a")
+        sampler.admit("alice", "read", ["c", "b"])
+        sampler.admit("bob", "head", "a")
+        sampler.admit("bob", "head", "a")
+    sampler.flush()
+
+    summaries = {(record.actor, record.operation): record for record in submitted}
+    assert summaries.keys() == {("alice", "read"), ("bob", "head")}
+    assert summaries[("alice", "read")].symbols == ["b", "c"]
+    assert summaries[("alice", "read")].metadata == {"elided": 2}
+    assert summaries[("bob", "head")].symbols == ["a"]
+    assert summaries[("bob", "head")].metadata == {"elided": 2}
+
+
+def test_read_sampler_summary_submitted_without_further_reads(monkeypatch):
+    monkeypatch.setattr(audited_library, "_ELIDED_SUMMARY_INTERVAL", 0.05)
+    submitted = []
+    sampler = _ReadSampler(2, None, "lib", submitted.append)
+
+    sampler.admit("user", "read", "sym")
+    sampler.admit("user", "read", "sym")
+
+    deadline = time.monotonic() + 5
+    while not submitted and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [record.metadata for record in submitted] == [{"elided": 1}]
+
+
+def test_audited_library_summary_written_on_close(lmdb_library, tmp_path):
+    lmdb_library.write("sym", pd.DataFrame({"col": [1, 2, 3]}))
+    audit_logger = AuditLogger(str(tmp_path / "audit.log"), enable_console=False)
+    lib = AuditedLibrary(lmdb_library, audit_logger, audit_sampling=5)
+
+    for _ in range(10):
+        lib.read("sym", user_id="user")
+    audit_logger.close()
+
+    entries = audit_logger.read_logs()
+    reads = [entry for entry in entries if entry.metadata is None or "elided" not in entry.metadata]
+    summaries = [entry for entry in entries if entry.metadata and "elided" in entry.metadata]
+    assert len(reads) == 2
+    assert len(summaries) == 1
+    assert summaries[0].symbols == ["sym"]
+    assert summaries[0].metadata["elided"] == 8
+
+
+def test_audited_library_summary_written_at_exit(tmp_path):
+    log_file = tmp_path / "audit.log"
+    # Exits without closing the logger, leaving the summary to the atexit handler
+    code = f"""
+import pandas as pd
+from arcticdb import Arctic
+from arcticdb.audit import AuditedLibrary, AuditLogger
+
+lib = Arctic({f"lmdb://{tmp_path / 'db'}"!r}).create_library("lib")
+lib.write("sym", pd.DataFrame({{"col": [1, 2, 3]}}))
+audited_lib = AuditedLibrary(lib, AuditLogger({str(log_file)!r}, enable_console=False), audit_sampling=10)
+for _ in range(25):
+    audited_lib.read("sym", user_id="user")
+"""
+    run([sys.executable], universal_newlines=True, input=code, check=True, timeout=60)
+
+    audit_logger = AuditLogger(str(log_file), enable_console=False)
+    entries = audit_logger.read_logs()
+    audit_logger.close()
+    reads = [entry for entry in entries if entry.metadata is None or "elided" not in entry.metadata]
+    summaries = [entry for entry in entries if entry.metadata and "elided" in entry.metadata]
+    assert len(reads) == 3
+    assert [summary.metadata["elided"] for summary in summaries] == [22]
+
+
+def test_audited_library_records_falsy_as_of_and_versions(lmdb_library, tmp_path):
+    for i in range(3):
+        lmdb_library.write("sym", pd.DataFrame({"col": [i]}))
+    audit_logger = AuditLogger(str(tmp_path / "audit.log"), enable_console=False)
+    lib = AuditedLibrary(lmdb_library, audit_logger)
+
+    lib.read("sym", as_of=0, user_id="user")
+    lib.delete("sym", versions=0, user_id="user")
+    lib.delete("sym", versions=[1, 2], user_id="user")
+    audit_logger.close()
+
+    entries = audit_logger.read_logs()[::-1]
+    assert [(entry.operation, entry.metadata) for entry in entries] == [
+        ("read", {"as_of": 0, "lazy": False}),
+        ("delete", {"versions": 0}),
+        ("delete", {"versions": [1, 2]}),
+    ]
+
+
+def _writer_threads():
+    return {thread for thread in threading.enumerate() if thread.name == "arcticdb-audit-writer"}
+
+
+def test_audited_library_with_disabled_logger(lmdb_library, tmp_path):
+    log_file = tmp_path / "audit.log"
+    writer_threads = _writer_threads()
+    audit_logger = AuditLogger(str(log_file), enable_console=False, enabled=False)
+    lib = AuditedLibrary(lmdb_library, audit_logger)
+
+    assert lib.write("sym", pd.DataFrame({"col": [1]}), user_id="user").version == 0
+    assert lib.read("sym", user_id="user").version == 0
+    lib.delete("sym", user_id="user")
+    with pytest.raises(ValueError):
+        lib.read("sym")
+    with pytest.raises(ValueError):
+        lib.write("sym", pd.DataFrame({"col": [1]}))
+
+    assert _writer_threads() <= writer_threads
+    assert not lmdb_library.has_symbol("sym")
+    audit_logger.close()
+    assert not log_file.exists()
+    assert audit_logger.read_logs() == []
+
+
+def test_audited_library_passes_other_methods_through(lmdb_library, tmp_path):
+    audit_logger = AuditLogger(str(tmp_path / "audit.log"), enable_console=False)
+    lib = AuditedLibrary(lmdb_library, audit_logger)
+    lmdb_library.write("sym", pd.DataFrame({"col": [1]}))
+
+    assert lib.list_symbols() == ["sym"]
+    assert lib.has_symbol("sym")
+    assert lib.list_symbols.__self__ is lmdb_library
+    assert lib.name == lmdb_library.name
+    # Nothing is cached on the wrapper, which has no instance __dict__
+    with pytest.raises(AttributeError):
+        lib.list_symbols = None
+    # Pass-through methods aren't audited
+    audit_logger.close()
+    assert audit_logger.read_logs() == []
+
+
+class _LogOnlyLogger:
+    def __init__(self):
+        self.entries = []
+
+    def log(self, actor, operation, symbols, library, metadata=None):
+        self.entries.append((actor, operation, symbols, library, metadata))
+
+
+def test_audited_library_with_log_only_logger(lmdb_library):
+    audit_logger = _LogOnlyLogger()
+    lib = AuditedLibrary(lmdb_library, audit_logger, audit_sampling=2)
+
+    lib.write("sym", pd.DataFrame({"col": [1]}), user_id="user")
+    lib.read("sym", as_of=0, user_id="user")
+    lib.read("sym", user_id="user")
+
+    assert audit_logger.entries == [
+        ("user", "write", ["sym"], lmdb_library.name, {"prune_previous_versions": False, "staged": False}),
+        ("user", "read", ["sym"], lmdb_library.name, {"as_of": 0, "lazy": False}),
+    ]
+
+
+_DATA = pd.DataFrame({"col": [1]})
+
+
+@pytest.mark.parametrize(
+    "method, kwargs",
+    [
+        (
+            "write",
+            dict(
+                symbol="sym",
+                data=_DATA,
+                metadata={"key": "value"},
+                prune_previous_versions=True,
+                staged=True,
+                validate_index=False,
+                index_column="idx",
+            ),
+        ),
+        (
+            "read",
+            dict(
+                symbol="sym",
+                as_of=3,
+                date_range=(None, None),
+                row_range=(0, 1),
+                columns=["col"],
+                query_builder="query",
+                lazy=True,
+                output_format="pandas",
+            ),
+        ),
+        (
+            "write_batch",
+            dict(payloads=[WritePayload("sym", _DATA)], prune_previous_versions=True, validate_index=False),
+        ),
+        (
+            "read_batch",
+            dict(symbols=["sym", ReadRequest("other")], query_builder="query", lazy=True, output_format="pandas"),
+        ),
+        (
+            "update",
+            dict(
+                symbol="sym",
+                data=_DATA,
+                metadata={"key": "value"},
+                upsert=True,
+                date_range=(None, None),
+                prune_previous_versions=True,
+            ),
+        ),
+        (
+            "append",
+            dict(
+                symbol="sym",
+                data=_DATA,
+                metadata={"key": "value"},
+                prune_previous_versions=True,
+                validate_index=False,
+            ),
+        ),
+        ("delete", dict(symbol="sym", versions=3)),
+    ],
+)
+@pytest.mark.parametrize("enabled", [True, False])
+def test_audited_library_forwards_arguments(tmp_path, method, kwargs, enabled):
+    library = create_autospec(Library, instance=True)
+    library._nvs = MagicMock()
+    library._nvs._lib_cfg.lib_desc.name = "lib"
+    audit_logger = AuditLogger(str(tmp_path / "audit.log"), enable_console=False, enabled=enabled)
+    lib = AuditedLibrary(library, audit_logger)
+
+    getattr(lib, method)(**kwargs, user_id="user")
+    audit_logger.close()
+
+    # Calls are forwarded positionally, so map them back onto Library's parameters
+    library_method = getattr(library, method)
+    library_method.assert_called_once()
+    args, forwarded_kwargs = library_method.call_args
+    forwarded = inspect.signature(getattr(Library, method)).bind(library, *args, **forwarded_kwargs).arguments
+    del forwarded["self"]
+    assert forwarded == kwargs
+
+
+def test_audited_library_delete_with_generator(tmp_path):
+    library = create_autospec(Library, instance=True)
+    library._nvs = MagicMock()
+    library._nvs._lib_cfg.lib_desc.name = "lib"
+    audit_logger = AuditLogger(str(tmp_path / "audit.log"), enable_console=False)
+    lib = AuditedLibrary(library, audit_logger)
+
+    lib.delete("sym", versions=(version for version in [1, 2]), user_id="user")
+    audit_logger.close()
+
+    library.delete.assert_called_once_with("sym", (1, 2))
+    (entry,) = audit_logger.read_logs()
+    assert entry.metadata == {"versions": [1, 2]}
+
+
+@pytest.mark.parametrize("kwargs", [{"audit_sampling": 0}, {"audit_rate_limit": 0}, {"audit_rate_limit": -1}])
+def test_audited_library_rejects_invalid_sampling(lmdb_library, tmp_path, kwargs):
+    audit_logger = AuditLogger(str(tmp_path / "audit.log"), enable_console=False)
+    with pytest.raises(ValueError):
+        AuditedLibrary(lmdb_library, audit_logger, **kwargs)
+    audit_logger.close()
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+import arcticdb.scripts.migrate_audit as migrate_audit
+from arcticdb.audit import AuditLogger
+
+
+def _migrate(lib, monkeypatch, **kwargs):
+    # Migrate the fixture's library rather than opening the same LMDB environment a second time
+    arctic = SimpleNamespace(get_library=lambda name: lib)
+    monkeypatch.setattr(migrate_audit, "adb", SimpleNamespace(Arctic=lambda uri: arctic))
+    return migrate_audit.migrate_library("lmdb://unused", lib.name, **kwargs)
+
+
+def _read_logs(path):
+    audit_logger = AuditLogger(str(path), enable_console=False)
+    entries = audit_logger.read_logs()[::-1]
+    audit_logger.close()
+    return entries
+
+
+def test_migrate_library(lmdb_library, tmp_path, monkeypatch):
+    for i in range(3):
+        lmdb_library.write("a", pd.DataFrame({"col": [i]}))
+    lmdb_library.write("b", pd.DataFrame({"col": [0]}))
+    audit_log = tmp_path / "audit.log"
+
+    assert _migrate(lmdb_library, monkeypatch, audit_log_file=str(audit_log))
+
+    entries = _read_logs(audit_log)
+    assert sorted((entry.symbols[0], entry.metadata["version"]) for entry in entries) == [
+        ("a", 0),
+        ("a", 1),
+        ("a", 2),
+        ("b", 0),
+    ]
+    assert {(entry.actor, entry.operation, entry.library) for entry in entries} == {
+        (migrate_audit.DEFAULT_MIGRATION_USER, "migrate_metadata", lmdb_library.name)
+    }
+
+
+def test_migrate_symbol_dry_run_matches_real_run(lmdb_library):
+    df = pd.DataFrame({"col": [0]})
+    lmdb_library.write("sym", df)
+    lmdb_library.write("sym", df, metadata={"_audit_user_id": "alice"})
+    lmdb_library.write("sym", df, metadata={"owner": "bob"})
+    lmdb_library.write("sym", df, metadata="not a dict")
+
+    dry_run = migrate_audit._migrate_symbol(lmdb_library, "sym", lmdb_library.name, "migrator", None, True)
+    real_run = migrate_audit._migrate_symbol(lmdb_library, "sym", lmdb_library.name, "migrator", None, False)
+
+    for result in (dry_run, real_run):
+        assert result.migrated
+        # Versions 0 and 2 lack audit metadata, version 1 already has it and version 3's metadata isn't a dict
+        assert result.versions_migrated == 2
+        assert result.versions_skipped == 1
+        assert len(result.errors) == 1
+        assert "version 3" in result.errors[0]
+
+
+def test_migrate_library_dry_run_logs_nothing(lmdb_library, tmp_path, monkeypatch):
+    lmdb_library.write("sym", pd.DataFrame({"col": [0]}))
+    audit_log = tmp_path / "audit.log"
+
+    assert _migrate(lmdb_library, monkeypatch, audit_log_file=str(audit_log), dry_run=True)
+
+    assert _read_logs(audit_log) == []